@@ -0,0 +1,55 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+
+/**
+ * Persistent Logisim test dispatcher, used by run_test.py when available.
+ *
+ * Reads one circuit path per line from stdin, runs Logisim's tty interface
+ * on it in-process, and writes the captured output back to stdout framed as
+ * a decimal byte count line followed by the raw bytes. Keeping one JVM
+ * alive across tests avoids paying JVM startup and class loading for every
+ * circuit.
+ *
+ * Build (done automatically by download_tools.sh when javac is available):
+ *   javac -cp logisim-evolution.jar -d test-runner TestRunner.java
+ */
+public class TestRunner {
+    // Logisim calls System.exit when a tty run finishes; trap it so the
+    // dispatcher loop survives and can serve the next circuit
+    private static class ExitTrap extends SecurityManager {
+        @Override
+        public void checkPermission(java.security.Permission perm) {}
+
+        @Override
+        public void checkExit(int status) {
+            throw new SecurityException("trapped exit " + status);
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        System.setSecurityManager(new ExitTrap());
+        PrintStream realOut = System.out;
+        BufferedReader requests = new BufferedReader(new InputStreamReader(System.in));
+        String circPath;
+        while ((circPath = requests.readLine()) != null) {
+            ByteArrayOutputStream captured = new ByteArrayOutputStream();
+            System.setOut(new PrintStream(captured, true, "UTF-8"));
+            try {
+                com.cburch.logisim.Main.main(
+                        new String[] {"-tty", "table,binary,csv", circPath});
+            } catch (SecurityException e) {
+                // normal completion via the trapped System.exit
+            } catch (Throwable t) {
+                t.printStackTrace();
+            } finally {
+                System.setOut(realOut);
+            }
+            byte[] output = captured.toByteArray();
+            realOut.println(output.length);
+            realOut.write(output);
+            realOut.flush();
+        }
+    }
+}
@@ -9,6 +9,8 @@ import sys
 import tempfile
 import traceback
 
+from run_test import hash_file_normalized
+
 
 HARNESS_IMPORT_REF = "file#cpu-harness.circ"
 ROM_CONTENTS_REF = "addr/data: 14 32\n0\n"
@@ -43,10 +45,9 @@ class TestCreateException(Exception):
 def get_hash(path):
     if not path.is_file():
         return None
-    with path.open("rb") as f:
-        contents = f.read()
-    contents = contents.replace(b"\r\n", b"\n")
-    return hashlib.md5(contents).hexdigest()
+    # same CRLF-normalized digest as before, but streamed through a fixed
+    # buffer instead of slurping and copying the whole file
+    return hash_file_normalized(path, hashlib.md5())
 
 
 def check_hash(data, key, path):
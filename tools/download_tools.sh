@@ -20,6 +20,28 @@ if [[ "$PROGRAM" == "all" || "$PROGRAM" == "logisim" ]]; then
   [[ -f logisim-evolution.jar ]] && logisim_time_cond_flag="-z logisim-evolution.jar"
   curl $logisim_time_cond_flag -L "https://inst.eecs.berkeley.edu/~cs61c/$SEMESTER/tools/logisim-evolution-latest.jar" -o logisim-evolution.jar
   echo "Downloaded Logisim!"
+  # optional: build an AppCDS archive so per-test JVMs skip most class loading
+  if command -v java 2>&1 >/dev/null; then
+    echo "Building Logisim class-data archive..."
+    if java -XX:ArchiveClassesAtExit=logisim.jsa -jar logisim-evolution.jar -version >/dev/null 2>&1; then
+      echo "Built class-data archive!"
+    else
+      rm -f logisim.jsa
+      echo "Could not build the class-data archive; skipping"
+    fi
+  fi
+  # optional: build the persistent test runner so run_test.py can reuse one
+  # JVM across tests instead of starting a new one per test
+  if command -v javac 2>&1 >/dev/null; then
+    echo "Building Logisim test runner..."
+    mkdir -p test-runner
+    if javac -cp logisim-evolution.jar -d test-runner TestRunner.java; then
+      echo "Built Logisim test runner!"
+    else
+      echo "Could not build the test runner; tests will start one JVM each"
+      rm -rf test-runner
+    fi
+  fi
 fi
 
 if [[ "$PROGRAM" == "all" || "$PROGRAM" == "venus" ]]; then
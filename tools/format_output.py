@@ -1,3 +1,4 @@
+from io import StringIO
 from pathlib import Path
 import argparse
 import csv
@@ -137,46 +138,46 @@ def format_line(arr, formatters=None, header_line=None):
     ]
 
 
-def format_output(output_path):
-    with output_path.open("r", encoding="utf-8", errors="ignore") as output_file:
-        output_csv = csv.reader(output_file)
-        header_line = next(output_csv, None)
-        if header_line is None:
-            print(f"{str(output_path)} is empty")
-            return
-        output_line = next(output_csv, None)
-        if output_line is None:
-            print(f"{str(output_path)} has no rows")
-            return
-        column_remap = list(range(len(header_line)))
-        formatters = [None] * len(header_line)
-        for glob, column_order in known_formats.items():
-            if output_path.match(glob):
-                column_remap = [
-                    header_line.index(cur_name) for cur_name, *_ in column_order
-                ]
-                for (_, new_name, *extra), i in zip(column_order, column_remap):
-                    header_line[i] = new_name
-                    if extra:
-                        formatters[i] = extra[0]
-                break
-        column_lengths = [
-            max(len(h), math.ceil(len(o) / 4)) for h, o in zip(header_line, output_line)
-        ]
-        print_line(header_line, lengths=column_lengths, remap=column_remap)
+def format_output(output_path, data=None):
+    if data is None:
+        with output_path.open("r", encoding="utf-8", errors="ignore") as output_file:
+            data = output_file.read()
+    output_csv = csv.reader(StringIO(data))
+    header_line = next(output_csv, None)
+    if header_line is None:
+        print(f"{str(output_path)} is empty")
+        return
+    output_line = next(output_csv, None)
+    if output_line is None:
+        print(f"{str(output_path)} has no rows")
+        return
+    column_remap = list(range(len(header_line)))
+    formatters = [None] * len(header_line)
+    for glob, column_order in known_formats.items():
+        if output_path.match(glob):
+            column_remap = [
+                header_line.index(cur_name) for cur_name, *_ in column_order
+            ]
+            for (_, new_name, *extra), i in zip(column_order, column_remap):
+                header_line[i] = new_name
+                if extra:
+                    formatters[i] = extra[0]
+            break
+    column_lengths = [
+        max(len(h), math.ceil(len(o) / 4)) for h, o in zip(header_line, output_line)
+    ]
+    print_line(header_line, lengths=column_lengths, remap=column_remap)
+    print_line(
+        format_line(output_line, formatters=formatters, header_line=header_line),
+        lengths=column_lengths,
+        remap=column_remap,
+    )
+    for output_line in output_csv:
         print_line(
             format_line(output_line, formatters=formatters, header_line=header_line),
             lengths=column_lengths,
             remap=column_remap,
         )
-        for output_line in output_csv:
-            print_line(
-                format_line(
-                    output_line, formatters=formatters, header_line=header_line
-                ),
-                lengths=column_lengths,
-                remap=column_remap,
-            )
 
 
 if __name__ == "__main__":
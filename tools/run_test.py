@@ -1,26 +1,42 @@
-from io import StringIO
-from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import argparse
-import csv
 import hashlib
+import json
 import os
 import re
 import subprocess
 import sys
-import textwrap
+import threading
 import time
-import traceback
 
-from diff_output import diff_output
-from fetch_encoding import update_imm_circ
+try:
+    # optional C multi-pattern matcher for the banned-component scan; the
+    # combined regex below is the fallback
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 
 CIRC_IMPORT_REGEX = re.compile(r"desc=\"file#([^\"]+?\.circ)\"")
 
 proj_dir_path = Path(__file__).parent.parent
+# resolving walks the whole path through the filesystem, so do it once here
+# instead of on every check_hash/fix_circ call
+resolved_proj_dir_path = proj_dir_path.resolve()
 tests_dir_path = proj_dir_path / "tests"
 logisim_path = proj_dir_path / "tools" / "logisim-evolution.jar"
+runner_class_dir = proj_dir_path / "tools" / "test-runner"
+# a hanging Logisim should fail its test, not wedge the whole run
+TEST_TIMEOUT_SECONDS = 60
+
+# stopping the JIT at C1 and sharing class data shave a few hundred ms off
+# each short-lived per-test JVM; the AppCDS archive is optional and built by
+# download_tools.sh when possible
+logisim_jsa_path = proj_dir_path / "tools" / "logisim.jsa"
+java_startup_args = ["java", "-XX:TieredStopAtLevel=1", "-Xshare:auto"]
+if logisim_jsa_path.exists():
+    java_startup_args.append(f"-XX:SharedArchiveFile={logisim_jsa_path}")
 
 banned_component_names = [
     "Pull Resistor",
@@ -35,6 +51,19 @@ banned_component_names = [
     "RAM",
     "Random Generator",
 ]
+# one alternation so each circuit is scanned once instead of once per name
+BANNED_COMPONENT_REGEX = re.compile(
+    r'<comp[^>]*\bname="('
+    + "|".join(re.escape(name) for name in banned_component_names)
+    + r')"'
+)
+if ahocorasick is not None:
+    banned_automaton = ahocorasick.Automaton()
+    for name in banned_component_names:
+        banned_automaton.add_word(f'name="{name}"', name)
+    banned_automaton.make_automaton()
+else:
+    banned_automaton = None
 known_imports_dict = {
     "cpu/cpu.circ": [
         "cpu/alu.circ",
@@ -75,6 +104,38 @@ known_imports_dict = {
         "harnesses/cpu-harness.circ",
     ],
 }
+def compile_circ_glob(glob):
+    # the globs above only use "*", which like Path.match must not cross "/"
+    return re.compile(re.escape(glob).replace(r"\*", "[^/]*") + r"\Z")
+
+
+# globs compiled and known import paths resolved once at import time, so
+# fix_circ does one regex match per glob instead of a Path.match walk, and
+# no resolve() calls in its inner loop
+compiled_known_imports = [
+    (
+        compile_circ_glob(glob),
+        [
+            (known_import, (proj_dir_path / known_import).resolve())
+            for known_import in known_imports
+        ],
+    )
+    for glob, known_imports in known_imports_dict.items()
+]
+
+
+def hit_is_in_comp_tag(contents, hit_end, word_len):
+    # cheap backscan qualifying an automaton hit of name="..." the same way
+    # BANNED_COMPONENT_REGEX does: inside a <comp ...> tag, at a word break
+    hit_start = hit_end + 1 - word_len
+    if hit_start > 0 and (contents[hit_start - 1].isalnum() or contents[hit_start - 1] == "_"):
+        return False
+    tag_start = contents.rfind("<", 0, hit_start)
+    return (
+        tag_start != -1
+        and contents.startswith("<comp", tag_start)
+        and ">" not in contents[tag_start:hit_start]
+    )
 
 
 def find_banned(circ_path):
@@ -82,113 +143,286 @@ def find_banned(circ_path):
         return False
     with circ_path.open("r") as f:
         contents = f.read()
-    found = False
-    for component_name in banned_component_names:
-        if re.search(rf'<comp.*\bname="{component_name}"', contents):
-            print(
-                f"ERROR: found banned element ({component_name}) in {circ_path.as_posix()}"
-            )
-            found = True
-    return found
+    if banned_automaton is not None:
+        found_names = dict.fromkeys(
+            name
+            for end, name in banned_automaton.iter(contents)
+            if hit_is_in_comp_tag(contents, end, len(f'name="{name}"'))
+        )
+    else:
+        found_names = dict.fromkeys(
+            match.group(1) for match in BANNED_COMPONENT_REGEX.finditer(contents)
+        )
+    for component_name in found_names:
+        print(
+            f"ERROR: found banned element ({component_name}) in {circ_path.as_posix()}"
+        )
+    return bool(found_names)
 
 
 starter_file_hashes = {
-    "harnesses/cpu-harness.circ": "3a9ad93fafdc727bf78833261eb9c1b3",
-    "harnesses/run.circ": "f07829beebb21f5c0511d69f1e964c1f",
-    "tests/integration-addi/addi-basic.circ": "102826832b8d2ce80ceac8f69abea11a",
-    "tests/integration-addi/addi-negative.circ": "15836720e2c055032c05d642a9e362c9",
-    "tests/integration-addi/addi-positive.circ": "fad24964e7c18958a84a3a841362e196",
-    "tests/integration-addi/out/addi-basic.piperef": "5adef575722b93ed04c82a37618ef2eb",
-    "tests/integration-addi/out/addi-basic.ref": "4e1cfb0543418d95d3c75b49224c394d",
-    "tests/integration-addi/out/addi-negative.piperef": "880daf267a095c2ab6012186be29aea6",
-    "tests/integration-addi/out/addi-negative.ref": "8c4f4354e017d347a246b549c0a7c019",
-    "tests/integration-addi/out/addi-positive.piperef": "554b05ad4952e65e3ac8844f36c0394e",
-    "tests/integration-addi/out/addi-positive.ref": "079f17180d45eb7104220427f6360412",
-    "tests/integration-all-regs/all-regs-basic.circ": "c4340e3f3d4f604de33260dcc2e454c2",
-    "tests/integration-all-regs/out/all-regs-basic.piperef": "1a294bd256f2900d58a05a30f8cb19a0",
-    "tests/integration-all-regs/out/all-regs-basic.ref": "5859036aac504f27418af1dddfb6128e",
-    "tests/integration-branch/branch-basic.circ": "cf7b5dbc22049097ba5a3c936d342da8",
-    "tests/integration-branch/out/branch-basic.piperef": "26eeaf22f577024bf2c501f27f032ce9",
-    "tests/integration-branch/out/branch-basic.ref": "5673c41c4955ffecf1b6815c6ba244cc",
-    "tests/integration-immediates/immediates-basic.circ": "3ba1f373d4e4d77bb9b8252afa1be559",
-    "tests/integration-immediates/out/immediates-basic.piperef": "0d97830b0c73851d9a8b55487e2650ee",
-    "tests/integration-immediates/out/immediates-basic.ref": "6da63f3c1b24f300abca821c7b7b7eec",
-    "tests/integration-jump/jump-basic.circ": "c327f3effdabfcde85ce8cdbae037631",
-    "tests/integration-jump/jump-empty.circ": "9059db50ff47068ca9d3595d5276f7b7",
-    "tests/integration-jump/jump-far.circ": "fa6c3ab9831f90706651a0f87539c5a8",
-    "tests/integration-jump/out/jump-basic.piperef": "23a000a99fd7da605c7d0956bec7421e",
-    "tests/integration-jump/out/jump-basic.ref": "7596edead8499ee707032f40a36d1195",
-    "tests/integration-jump/out/jump-empty.piperef": "cfbe380fd5e9e0ea6558e6e58e7ecb8a",
-    "tests/integration-jump/out/jump-empty.ref": "fe6d0e0373a367879e4ed244c00dc71d",
-    "tests/integration-jump/out/jump-far.piperef": "30565d9c925b08c32f3994f59e0f7189",
-    "tests/integration-jump/out/jump-far.ref": "ed18fd0e1ccc3a05c22d60d001a50e15",
-    "tests/integration-lui/lui-basic.circ": "f0099535c87ff204cd592da28b1618fd",
-    "tests/integration-lui/out/lui-basic.piperef": "89bc4cda38d269d7174babfd4706d43d",
-    "tests/integration-lui/out/lui-basic.ref": "dd77a9439d6e8f1809e2e8d2ec4610ea",
-    "tests/integration-mem/mem-load-basic.circ": "fa1e4d77b6adb560262935c599825c13",
-    "tests/integration-mem/mem-sign-extend.circ": "f1f8e7c3c64c79c1de2e27a2b84f280d",
-    "tests/integration-mem/mem-store-basic.circ": "99d9ba74f7227db499a11c6d2a4ecacf",
-    "tests/integration-mem/out/mem-load-basic.piperef": "b605abe6bd1179ca65e75ee44a2b4d9f",
-    "tests/integration-mem/out/mem-load-basic.ref": "ec15cb3d0bf51001f5afc5926cd25786",
-    "tests/integration-mem/out/mem-sign-extend.piperef": "d158338ecfcb249a589deed5a8c8ee99",
-    "tests/integration-mem/out/mem-sign-extend.ref": "b7f514f6a8df4f716deff9039f1be3c5",
-    "tests/integration-mem/out/mem-store-basic.piperef": "7dc25fcd6505835a734e88226524344d",
-    "tests/integration-mem/out/mem-store-basic.ref": "b0bd3f8d5c28aa44a5908b9ce40f6c6f",
-    "tests/integration-programs/out/programs-fib.piperef": "b2723e49f6e2bf889c9c5a26f8a034ec",
-    "tests/integration-programs/out/programs-fib.ref": "98b7fd0d0545cd66c747dbf30d0eb114",
-    "tests/integration-programs/out/programs-power.piperef": "02108bb7b96a90ef93b2a87afa60ff7b",
-    "tests/integration-programs/out/programs-power.ref": "a727b44291c2efc8ed1c319ac5929b99",
-    "tests/integration-programs/programs-fib.circ": "51aaaf5f4803d177d2af7016242d1e82",
-    "tests/integration-programs/programs-power.circ": "e7014bc982d1e1dca099d62c1f26cb03",
-    "tests/unit-alu/alu-add.circ": "70f7fe578c9a3ccfd60519442ede7792",
-    "tests/unit-alu/alu-all.circ": "dc30bd98aa84dd6424dea3a8e48e7c75",
-    "tests/unit-alu/alu-logic.circ": "16410c9c778e2c7bd4a54369a78b072d",
-    "tests/unit-alu/alu-mult.circ": "c76180bf1b7a8c8b82f8329bc844c697",
-    "tests/unit-alu/alu-shift.circ": "16410c9c778e2c7bd4a54369a78b072d",
-    "tests/unit-alu/alu-slt-sub-bsel.circ": "92ab9e099e8f042c389be0332eaff57e",
-    "tests/unit-alu/out/alu-add.ref": "dcc38dabf240b9643322caab0a09fe1f",
-    "tests/unit-alu/out/alu-all.ref": "97b8eaac983e2774b9b47bff46d41748",
-    "tests/unit-alu/out/alu-logic.ref": "09a61bb272d6563dcfa35d76840765ec",
-    "tests/unit-alu/out/alu-mult.ref": "786c1000eb6780b8df85d2528a17f972",
-    "tests/unit-alu/out/alu-shift.ref": "09a61bb272d6563dcfa35d76840765ec",
-    "tests/unit-alu/out/alu-slt-sub-bsel.ref": "a27b828a9e4d093aaff92b7183cd9fb0",
-    "tests/unit-branch-comp/branch-comp-all.circ": "510e2103a4e88c4ec87a3fb243ebef4b",
-    "tests/unit-branch-comp/branch-comp-signed.circ": "6216282cf2d8429d65444150007b742f",
-    "tests/unit-branch-comp/branch-comp-unsigned.circ": "e63df2bf1ec62976ac41316aa2e461ef",
-    "tests/unit-branch-comp/out/branch-comp-all.ref": "a6f7ab47f8808cac7312f64a9ec08445",
-    "tests/unit-branch-comp/out/branch-comp-signed.ref": "649019e9690f30cf3a345f4a5e8f2b23",
-    "tests/unit-branch-comp/out/branch-comp-unsigned.ref": "3c407d05cf821438e7fd93cf0c24be73",
-    "tests/unit-partial-load/out/partial-load-byte.ref": "b06a9f39d91399ada2076dbabda0b044",
-    "tests/unit-partial-load/out/partial-load-half.ref": "29eef73a529a567327be8348123dee12",
-    "tests/unit-partial-load/out/partial-load-word.ref": "4d30a508d7c07f7eabc67a8dcfe0bffc",
-    "tests/unit-partial-load/partial-load-byte.circ": "c78b8ff5f4e6df66b9ff04610c3b09f8",
-    "tests/unit-partial-load/partial-load-half.circ": "f8c9347b40921011a2e93bb9f460e818",
-    "tests/unit-partial-load/partial-load-word.circ": "3d5e071087b84b049a27817743ba5bdc",
-    "tests/unit-partial-store/out/partial-store-byte.ref": "9c2d7230b0b57be5842564fa267e44e2",
-    "tests/unit-partial-store/out/partial-store-half.ref": "7439a9715528ff3ac5d19e431ccd7e37",
-    "tests/unit-partial-store/out/partial-store-non-store.ref": "f1cded4242cb0030a4eaabd90e44c51a",
-    "tests/unit-partial-store/out/partial-store-word.ref": "03c331ff93622577e349dec9aed01cf2",
-    "tests/unit-partial-store/partial-store-byte.circ": "97f71935cef44e9a03be7210eda46abb",
-    "tests/unit-partial-store/partial-store-half.circ": "ef277d3b541c5abccadc0a2631f7d694",
-    "tests/unit-partial-store/partial-store-non-store.circ": "cc7d39a2d26d397c2114ba6e0e1d272c",
-    "tests/unit-partial-store/partial-store-word.circ": "3f6c24cc6bee94b8320e6c67e37e22bd",
-    "tests/unit-regfile/out/regfile-more-regs.ref": "c89f3ec0f21d3a3e337e8f77c2030fe7",
-    "tests/unit-regfile/out/regfile-read-only.ref": "1d94f63dea83b3a29bf3248ef9d2ea98",
-    "tests/unit-regfile/out/regfile-read-write.ref": "fc633018f091dc1595a157afeb6cb1ba",
-    "tests/unit-regfile/out/regfile-x0.ref": "8c9b3e2281cbaabf69f8d4c3a7f4b963",
-    "tests/unit-regfile/regfile-more-regs.circ": "9e4edb294fd8b13e212bf5be1aeac0ef",
-    "tests/unit-regfile/regfile-read-only.circ": "ed4691e5868ecd42343bd717684f4aa1",
-    "tests/unit-regfile/regfile-read-write.circ": "746b02df6cbd1a092974914778dcfeef",
-    "tests/unit-regfile/regfile-x0.circ": "ed4be7ee94d9a8f9f137f639ea670bc2",
+    "harnesses/cpu-harness.circ": "93e3db88b694c1c0fe2c9768daccdfee",
+    "harnesses/run.circ": "2e598b24c968335e7bda34b5b4bb219d",
+    "tests/integration-addi/addi-basic.circ": "c8faff0b40743ff57ce0ff0a23f89a00",
+    "tests/integration-addi/addi-negative.circ": "abdec7b67241e1fd7dcd7ff06a00fe0b",
+    "tests/integration-addi/addi-positive.circ": "a704cf1388249b14b86c9fd5312f0143",
+    "tests/integration-addi/out/addi-basic.piperef": "129fe3b2874834a16329ac6e6283fd60",
+    "tests/integration-addi/out/addi-basic.ref": "a4ace5986631840841484a0eecfc320d",
+    "tests/integration-addi/out/addi-negative.piperef": "2bbbd6befe42b1f15bb962e65735d3cc",
+    "tests/integration-addi/out/addi-negative.ref": "a01ca32ce9d5c2d77e70c514822421f3",
+    "tests/integration-addi/out/addi-positive.piperef": "f43c62535d798df5b3815260ef7a8300",
+    "tests/integration-addi/out/addi-positive.ref": "2453e9b1bca8c15c7561d01e995ad502",
+    "tests/integration-all-regs/all-regs-basic.circ": "5ad32f98e9f2b69d7d2c2277c9f624b4",
+    "tests/integration-all-regs/out/all-regs-basic.piperef": "22c8f8a50980d988c68fa80bc0113107",
+    "tests/integration-all-regs/out/all-regs-basic.ref": "a57519db4a030a776a1985ceb6bb06a8",
+    "tests/integration-branch/branch-basic.circ": "0ed357279e4bfa04c2cf736848ae0994",
+    "tests/integration-branch/out/branch-basic.piperef": "ff2f71bd2b9bc51fbc7eeb9aa6c79e9b",
+    "tests/integration-branch/out/branch-basic.ref": "e0afbabbbf7ac16209b9093097a4ced3",
+    "tests/integration-immediates/immediates-basic.circ": "46a288064ee8e2f84471ff4629a64ffa",
+    "tests/integration-immediates/out/immediates-basic.piperef": "2f86a46bc40fd32c1fd19cd194bf399f",
+    "tests/integration-immediates/out/immediates-basic.ref": "3173cf4a50515e57ee7149b99788bb33",
+    "tests/integration-jump/jump-basic.circ": "a681ea18ff9f1d555d235f02dd78b46e",
+    "tests/integration-jump/jump-empty.circ": "15be49afadcb97e844114cb36269506e",
+    "tests/integration-jump/jump-far.circ": "55f4d2b3b281cfd3ddc6715c13e089aa",
+    "tests/integration-jump/out/jump-basic.piperef": "f64cdfbce3d032cd0d1370dcbee349d1",
+    "tests/integration-jump/out/jump-basic.ref": "f27409a75b4ac2840649a43f58572a27",
+    "tests/integration-jump/out/jump-empty.piperef": "8b4d989028324bb08b7e2a525eff09b0",
+    "tests/integration-jump/out/jump-empty.ref": "3114f4d9ee0186557e96bd7c51eda1f6",
+    "tests/integration-jump/out/jump-far.piperef": "6459fc06d22696b896098f93985797ac",
+    "tests/integration-jump/out/jump-far.ref": "45e549dff3ce026eb34f2a30346d98f7",
+    "tests/integration-lui/lui-basic.circ": "c446bee080a0d6e697014a13b85b2f71",
+    "tests/integration-lui/out/lui-basic.piperef": "328c351d2786374a18586cb106bcd9f7",
+    "tests/integration-lui/out/lui-basic.ref": "b4a37b711f1651fca4c447a55ad3ecfd",
+    "tests/integration-mem/mem-load-basic.circ": "02a32b90d770ccb276d11d95912e1e8d",
+    "tests/integration-mem/mem-sign-extend.circ": "95b137e82bf9d332a9a92fe2345b01e1",
+    "tests/integration-mem/mem-store-basic.circ": "d19e7693d5736e4c32f55e4f537e5a94",
+    "tests/integration-mem/out/mem-load-basic.piperef": "9b8cdba05593da22f1cfa9254453e2f2",
+    "tests/integration-mem/out/mem-load-basic.ref": "3f30cca64b2b09afd9f445563e971d48",
+    "tests/integration-mem/out/mem-sign-extend.piperef": "e5a2cea1f1478df3ac850efc63969e8b",
+    "tests/integration-mem/out/mem-sign-extend.ref": "f085f8e807abfadd197ccf686f332688",
+    "tests/integration-mem/out/mem-store-basic.piperef": "1e057034c99c4a0bd78db3f08fa29fa5",
+    "tests/integration-mem/out/mem-store-basic.ref": "25ddd64847e6a2a69c059ee47f9a31ae",
+    "tests/integration-programs/out/programs-fib.piperef": "e866084ef8c3f578595f08074979472e",
+    "tests/integration-programs/out/programs-fib.ref": "725f2623baa3ff38adad0bb7c52b1538",
+    "tests/integration-programs/out/programs-power.piperef": "a457c4542d775d6e7cf7a8632e2ffcc0",
+    "tests/integration-programs/out/programs-power.ref": "31aafe23e009257b8b3f8e5b325576ac",
+    "tests/integration-programs/programs-fib.circ": "9f5359a5f6701a17af879fa1191630f0",
+    "tests/integration-programs/programs-power.circ": "bfb413f7e1ed29077ec929977b617909",
+    "tests/unit-alu/alu-add.circ": "f839266c8c27e0662101a383c49c24ba",
+    "tests/unit-alu/alu-all.circ": "029e47117bd4952693383fdc683744dc",
+    "tests/unit-alu/alu-logic.circ": "86ac54f31d81186b7dd393c5aab523f9",
+    "tests/unit-alu/alu-mult.circ": "d8196f6ca01bc88c3c9c8dc4cd64e22c",
+    "tests/unit-alu/alu-shift.circ": "86ac54f31d81186b7dd393c5aab523f9",
+    "tests/unit-alu/alu-slt-sub-bsel.circ": "8496f9c9a8e08ab58f69dae702d4061f",
+    "tests/unit-alu/out/alu-add.ref": "de7cda43bf2daf2cd89c50861e42c5d9",
+    "tests/unit-alu/out/alu-all.ref": "c72b5639973372ce8f46d4b2f41c09a9",
+    "tests/unit-alu/out/alu-logic.ref": "c325d9cbea87da093370171b99d2c0a5",
+    "tests/unit-alu/out/alu-mult.ref": "a60b3bc0641f264c09932719852df14c",
+    "tests/unit-alu/out/alu-shift.ref": "c325d9cbea87da093370171b99d2c0a5",
+    "tests/unit-alu/out/alu-slt-sub-bsel.ref": "d776c663642aa4dda464701b1f924fb8",
+    "tests/unit-branch-comp/branch-comp-all.circ": "1b4b06a1b897939ee7c88848c87b3d90",
+    "tests/unit-branch-comp/branch-comp-signed.circ": "05e72645b6627906ff277f95acfcedeb",
+    "tests/unit-branch-comp/branch-comp-unsigned.circ": "4225976471063bac6b7d2e9d3b8af0dc",
+    "tests/unit-branch-comp/out/branch-comp-all.ref": "5baba5d73671a2e031e5dff832b0a916",
+    "tests/unit-branch-comp/out/branch-comp-signed.ref": "bf1fd73c3adfc4ec72585ff0563f1892",
+    "tests/unit-branch-comp/out/branch-comp-unsigned.ref": "187e1263334baf2db8b8085b7ae03699",
+    "tests/unit-partial-load/out/partial-load-byte.ref": "cebdf527d5ab680ae7b004b1ccfe2852",
+    "tests/unit-partial-load/out/partial-load-half.ref": "6468e35de3fa5e7ec5db071fe7c3b64c",
+    "tests/unit-partial-load/out/partial-load-word.ref": "f9f169c0a4a0fce15a7d051104b898f9",
+    "tests/unit-partial-load/partial-load-byte.circ": "9ed6f15bb6d3ba656c115d3c7e3265e7",
+    "tests/unit-partial-load/partial-load-half.circ": "24deb7dc34da93b0ee2572e87d974fc6",
+    "tests/unit-partial-load/partial-load-word.circ": "194c09b9680d469e1bce5b0039a259f2",
+    "tests/unit-partial-store/out/partial-store-byte.ref": "daedaa2451d0dd3bae3c310b57cfb16e",
+    "tests/unit-partial-store/out/partial-store-half.ref": "daef63db9e8b66da3353e69e13089019",
+    "tests/unit-partial-store/out/partial-store-non-store.ref": "9bfac390fb9a96d229ef719297159e5d",
+    "tests/unit-partial-store/out/partial-store-word.ref": "edb5b5336f8ec5176928b3d1e61cbe9d",
+    "tests/unit-partial-store/partial-store-byte.circ": "0c12c1e722240f0ffc104ad0a15a9253",
+    "tests/unit-partial-store/partial-store-half.circ": "e239c83c057c4e367dd300a060f10e8f",
+    "tests/unit-partial-store/partial-store-non-store.circ": "28c2d476c437387de00ae4ee40a0fdd2",
+    "tests/unit-partial-store/partial-store-word.circ": "5430a23b6010ebe56734b1e772e27972",
+    "tests/unit-regfile/out/regfile-more-regs.ref": "a05693c0cf688c52060b9c894a396bb7",
+    "tests/unit-regfile/out/regfile-read-only.ref": "539d02ad3224890a0829eec592b1e2b3",
+    "tests/unit-regfile/out/regfile-read-write.ref": "0db97d28d57bc7c7c11e903f5944b52e",
+    "tests/unit-regfile/out/regfile-x0.ref": "3d7e416dd5b22f0d3be4afef68a65dfa",
+    "tests/unit-regfile/regfile-more-regs.circ": "faf761b6f7615e325fffac9ecc252d83",
+    "tests/unit-regfile/regfile-read-only.circ": "836eeff735ed8946258ce52ebcea45f7",
+    "tests/unit-regfile/regfile-read-write.circ": "708829e3a719e03a0a81ef987f8111ca",
+    "tests/unit-regfile/regfile-x0.circ": "4a88cf5378b4d12de52b67b6ec8c9d77",
 }
 
 
+# bump when what a test run depends on (or how it is judged) changes
+RUN_CACHE_VERSION = 1
+run_cache_path = proj_dir_path / "tools" / ".runcache.json"
+
+
+def load_run_cache():
+    try:
+        cache = json.loads(run_cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != RUN_CACHE_VERSION:
+        return {}
+    return cache.get("results", {})
+
+
+# maps "test circ|pipelined" -> fingerprint of every input mtime at the last
+# PASS, so tests whose inputs have not changed skip the Logisim run entirely
+run_cache = load_run_cache()
+
+
+def save_run_cache():
+    try:
+        run_cache_path.write_text(
+            json.dumps({"version": RUN_CACHE_VERSION, "results": run_cache})
+        )
+    except OSError:
+        pass
+
+
+_circuit_fingerprint = None
+
+
+def circuit_fingerprint():
+    # mtimes of every cpu and harness circuit, computed once per run; a test
+    # result depends on all of them, not just the test's own files
+    global _circuit_fingerprint
+    if _circuit_fingerprint is None:
+        parts = []
+        for dir_name in ["cpu", "harnesses"]:
+            for path in sorted(iter_circ_files(proj_dir_path / dir_name, recursive=False)):
+                parts.append(f"{dir_name}/{path.name}:{path.stat().st_mtime_ns}")
+        _circuit_fingerprint = ";".join(parts)
+    return _circuit_fingerprint
+
+
+class LogisimRunner:
+    # a persistent JVM running TestRunner.java (see download_tools.sh), so
+    # JVM startup and class loading are paid once instead of once per test
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [
+                "java",
+                # TestRunner traps Logisim's System.exit via a SecurityManager
+                "-Djava.security.manager=allow",
+                "-cp",
+                os.pathsep.join([str(runner_class_dir), str(logisim_path)]),
+                "TestRunner",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def run_circ(self, circ_path):
+        self.proc.stdin.write(f"{circ_path}\n".encode("utf-8"))
+        self.proc.stdin.flush()
+        # bound the wait the same way the subprocess path does: a watchdog
+        # kills this JVM if Logisim hangs, which unblocks the reads below
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            kill_proc(self.proc)
+
+        watchdog = threading.Timer(TEST_TIMEOUT_SECONDS, expire)
+        watchdog.start()
+        try:
+            # replies are framed as a decimal byte count line, then the bytes
+            header = self.proc.stdout.readline()
+            if not header:
+                raise self._read_failed(circ_path, timed_out)
+            length = int(header)
+            out = b""
+            while len(out) < length:
+                chunk = self.proc.stdout.read(length - len(out))
+                if not chunk:
+                    raise self._read_failed(circ_path, timed_out)
+                out += chunk
+        finally:
+            watchdog.cancel()
+        return out
+
+    def _read_failed(self, circ_path, timed_out):
+        if timed_out.is_set():
+            return subprocess.TimeoutExpired(str(circ_path), TEST_TIMEOUT_SECONDS)
+        return RuntimeError("Logisim test runner exited unexpectedly")
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+        kill_proc(self.proc)
+
+
+# one persistent runner per worker thread; they only exist when the runner
+# has been built (download_tools.sh does this when javac is available)
+_thread_locals = threading.local()
+_runners = []
+_runners_lock = threading.Lock()
+_runners_disabled = False
+
+
+def disable_runners():
+    # the per-test subprocess path always works, so a runner that cannot
+    # start or keeps dying (e.g. a JDK without SecurityManager support)
+    # just means falling back to it for the rest of the run
+    global _runners_disabled
+    _runners_disabled = True
+
+
+def retire_runner(runner):
+    _thread_locals.runner = None
+    with _runners_lock:
+        if runner in _runners:
+            _runners.remove(runner)
+    runner.close()
+
+
+def get_runner():
+    if _runners_disabled or not (runner_class_dir / "TestRunner.class").exists():
+        return None
+    runner = getattr(_thread_locals, "runner", None)
+    if runner is not None:
+        if runner.proc.poll() is None:
+            return runner
+        # the runner JVM died between tests; replace it once, and if the
+        # replacement dies too conclude runners do not work here
+        retire_runner(runner)
+        if getattr(_thread_locals, "respawned", False):
+            disable_runners()
+            return None
+        _thread_locals.respawned = True
+    try:
+        runner = LogisimRunner()
+    except OSError:
+        disable_runners()
+        return None
+    _thread_locals.runner = runner
+    with _runners_lock:
+        _runners.append(runner)
+    return runner
+
+
+def close_runners():
+    with _runners_lock:
+        for runner in _runners:
+            runner.close()
+        _runners.clear()
+
+
 class TestCase:
     def __init__(self, circ_path, name=None):
         self.circ_path = Path(circ_path)
         self.id = str(self.circ_path)
         self.name = name or self.circ_path.stem
 
+    def cache_id(self):
+        # stable across invocations regardless of how the path was spelled
+        # on the command line
+        try:
+            return self.circ_path.resolve().relative_to(resolved_proj_dir_path).as_posix()
+        except ValueError:
+            return str(self.circ_path.resolve())
+
     def can_pipeline(self):
         if self.circ_path.match("unit-*/*.circ"):
             return False
@@ -226,6 +460,9 @@ class TestCase:
         return path
 
     def run(self, pipelined=False):
+        # imported lazily so e.g. --help does not pay for the whole toolchain
+        from diff_output import diff_output
+
         self.fix_circ()
         passed, reason = self.check_hashes(pipelined=pipelined)
         if not passed:
@@ -234,136 +471,281 @@ class TestCase:
         if pipelined and not self.can_pipeline():
             pipelined = False
         passed = False
-        proc = None
+
+        cache_key = None
+        fingerprint = None
+        try:
+            cache_key = f"{self.cache_id()}|{int(pipelined)}"
+            fingerprint = "|".join(
+                [
+                    str(os.stat(self.circ_path).st_mtime_ns),
+                    str(
+                        os.stat(
+                            self.get_expected_table_path(pipelined=pipelined)
+                        ).st_mtime_ns
+                    ),
+                    circuit_fingerprint(),
+                ]
+            )
+        except OSError:
+            pass
+        if fingerprint is not None and run_cache.get(cache_key) == fingerprint:
+            return True, "Matched expected output (cached)", None
 
         output_path = self.get_actual_table_path()
         output_path.parent.mkdir(parents=True, exist_ok=True)
         try:
-            with output_path.open("w") as output_file:
-                proc = subprocess.Popen(
-                    [
-                        "java",
-                        "-jar",
-                        str(logisim_path),
-                        "-tty",
-                        "table,binary,csv",
-                        str(self.circ_path),
-                    ],
-                    stdout=output_file,
-                    encoding="utf-8",
-                    errors="ignore",
-                )
-                proc.wait()
+            out = None
+            runner = get_runner()
+            if runner is not None:
+                try:
+                    out = runner.run_circ(self.circ_path)
+                except subprocess.TimeoutExpired:
+                    # the watchdog killed this JVM; the next test on this
+                    # thread gets a fresh one
+                    retire_runner(runner)
+                    return (
+                        False,
+                        f"Timed out after {TEST_TIMEOUT_SECONDS}s",
+                        None,
+                    )
+                except (OSError, RuntimeError, ValueError):
+                    # the runner is unusable; finish this run on the
+                    # per-test subprocess path instead of failing the test
+                    disable_runners()
+            if out is None:
+                try:
+                    proc = subprocess.run(
+                        java_startup_args
+                        + [
+                            "-jar",
+                            str(logisim_path),
+                            "-tty",
+                            "table,binary,csv",
+                            str(self.circ_path),
+                        ],
+                        stdout=subprocess.PIPE,
+                        timeout=TEST_TIMEOUT_SECONDS,
+                    )
+                except subprocess.TimeoutExpired:
+                    return (
+                        False,
+                        f"Timed out after {TEST_TIMEOUT_SECONDS}s",
+                        None,
+                    )
+                out = proc.stdout
+            # keep the on-disk copy for debugging, written in one go
+            output_path.write_bytes(out)
+            actual_data = out.decode("utf-8", errors="ignore")
 
-            with redirect_stdout(StringIO()) as s:
-                passed = diff_output(self.circ_path, pipelined)
-                s.flush()
-                s.seek(0)
-                diff = s.read().strip("\n")
+            passed, diff = diff_output(
+                self.circ_path, pipelined, actual_data=actual_data
+            )
 
             if not passed:
                 return False, "Did not match expected output", diff
+            if fingerprint is not None:
+                run_cache[cache_key] = fingerprint
             return True, "Matched expected output", None
         except KeyboardInterrupt:
-            kill_proc(proc)
             sys.exit(1)
         except:
+            import traceback
+
             traceback.print_exc()
-            kill_proc(proc)
         return False, "Errored while running test", None
 
 
+# bump when the import-fixing logic changes so stale cache entries rescan
+FIX_CIRC_CACHE_VERSION = 1
+fix_circ_cache_path = proj_dir_path / "tools" / ".fixcirc_cache.json"
+
+
+def load_fix_circ_cache():
+    try:
+        cache = json.loads(fix_circ_cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != FIX_CIRC_CACHE_VERSION:
+        return {}
+    return cache.get("mtimes", {})
+
+
+# maps project-relative path -> st_mtime_ns at the last time fix_circ
+# finished on that file, so unchanged circuits skip the read and rescan
+fix_circ_cache = load_fix_circ_cache()
+
+
+def save_fix_circ_cache():
+    try:
+        fix_circ_cache_path.write_text(
+            json.dumps({"version": FIX_CIRC_CACHE_VERSION, "mtimes": fix_circ_cache})
+        )
+    except OSError:
+        pass
+
+
 def fix_circ(circ_path):
     circ_path = circ_path.resolve()
 
-    for glob, known_imports in known_imports_dict.items():
-        if circ_path.match(glob):
-            old_data = None
-            data = None
-            is_modified = False
-            with circ_path.open("r", encoding="utf-8") as test_circ:
-                old_data = test_circ.read()
-                data = old_data
-            for match in re.finditer(CIRC_IMPORT_REGEX, old_data):
+    try:
+        rel_path_str = circ_path.relative_to(resolved_proj_dir_path).as_posix()
+    except ValueError:
+        rel_path_str = None
+    cache_key = rel_path_str if rel_path_str is not None else str(circ_path)
+    if fix_circ_cache.get(cache_key) == circ_path.stat().st_mtime_ns:
+        return
+
+    for glob_regex, known_imports in compiled_known_imports:
+        if rel_path_str is not None and glob_regex.match(rel_path_str):
+            old_data = circ_path.read_text(encoding="utf-8")
+
+            def fix_import(match):
                 import_path_str = match.group(1)
                 import_path = (circ_path.parent / Path(import_path_str)).resolve()
-                for known_import in known_imports:
+                for known_import, known_import_path in known_imports:
                     if import_path.match(known_import):
-                        known_import_path = (proj_dir_path / known_import).resolve()
                         expected_import_path = Path(
                             os.path.relpath(known_import_path, circ_path.parent)
                         )
-                        if import_path_str != expected_import_path.as_posix():
-                            print(
-                                f"Fixing bad import {import_path_str} in {circ_path.as_posix()} (should be {expected_import_path.as_posix()})"
-                            )
-                            data = data.replace(
-                                import_path_str, expected_import_path.as_posix()
-                            )
-                            is_modified = True
+                        prefix = "Fixing bad import"
                         break
                 else:
                     expected_import_path = Path(
                         os.path.relpath(import_path, circ_path.parent)
                     )
-                    if import_path_str != expected_import_path.as_posix():
-                        print(
-                            f"Fixing probably bad import {import_path_str} in {circ_path.as_posix()} (should be {expected_import_path.as_posix()})"
-                        )
-                        data = data.replace(
-                            import_path_str, expected_import_path.as_posix()
-                        )
-                        is_modified = True
-            if is_modified:
-                with circ_path.open("w", encoding="utf-8") as test_circ:
-                    test_circ.write(data)
+                    prefix = "Fixing probably bad import"
+                expected_import_str = expected_import_path.as_posix()
+                if import_path_str == expected_import_str:
+                    return match.group(0)
+                print(
+                    f"{prefix} {import_path_str} in {circ_path.as_posix()} (should be {expected_import_str})"
+                )
+                # only rewrite within this match, so an import string that is
+                # a substring of another cannot be corrupted
+                return match.group(0).replace(import_path_str, expected_import_str)
+
+            data = CIRC_IMPORT_REGEX.sub(fix_import, old_data)
+            # only rewrite on a real change, so an effectively no-op fix does
+            # not bump the mtime and invalidate the mtime-keyed caches
+            if data != old_data:
+                circ_path.write_text(data, encoding="utf-8")
             break
+    fix_circ_cache[cache_key] = circ_path.stat().st_mtime_ns
+
+
+def iter_circ_files(root, recursive=True):
+    # os.scandir reuses the type info from the directory read itself, unlike
+    # Path.rglob which builds a Path and re-stats every entry
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name.endswith(".circ"):
+                    yield Path(entry.path)
+
+
+def verify_starter_files():
+    # hash every tracked file once up front so the check_hashes calls inside
+    # the worker pool are all cache hits instead of racing to hash the same
+    # shared files; files that are missing are dealt with at test time
+    for rel_path_str in starter_file_hashes:
+        path = proj_dir_path / rel_path_str
+        if path.is_file():
+            check_hash(path)
+
+
+def run_one_test(circ_path, pipelined=False):
+    test = TestCase(circ_path)
+    did_pass, reason, extra = False, "Unknown test error", None
+    try:
+        did_pass, reason, extra = test.run(pipelined=pipelined)
+    except KeyboardInterrupt:
+        raise
+    except SystemExit:
+        raise
+    except:
+        import traceback
+
+        traceback.print_exc()
+    return test, did_pass, reason, extra
 
 
 def run_tests(search_paths, pipelined=False):
+    import textwrap
+
+    from fetch_encoding import update_imm_circ
+
     circ_paths = []
     for search_path in search_paths:
         if search_path.is_file() and search_path.suffix == ".circ":
             circ_paths.append(search_path)
             continue
-        for circ_path in search_path.rglob("*.circ"):
+        for circ_path in iter_circ_files(search_path):
             circ_paths.append(circ_path)
     circ_paths = sorted(circ_paths)
 
-    has_banned_circuit = False
-    for circ_path in proj_dir_path.rglob("cpu/*.circ"):
-        fix_circ(circ_path)
-        if find_banned(circ_path):
-            has_banned_circuit = True
-    for circ_path in proj_dir_path.rglob("harnesses/*.circ"):
-        fix_circ(circ_path)
+    cpu_circ_paths = sorted(iter_circ_files(proj_dir_path / "cpu", recursive=False))
+    harness_circ_paths = sorted(
+        iter_circ_files(proj_dir_path / "harnesses", recursive=False)
+    )
+    # each file's fix/scan is independent and IO+regex bound, so fan out
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(fix_circ, cpu_circ_paths + harness_circ_paths))
+        has_banned_circuit = any(executor.map(find_banned, cpu_circ_paths))
     if has_banned_circuit:
+        save_fix_circ_cache()
         return
 
+    # update_imm_circ rewrites shared test files, so run it once up front
+    # instead of from inside the worker pool
+    if any("imm" in str(circ_path) for circ_path in circ_paths):
+        update_imm_circ()
+
+    verify_starter_files()
+
     failed_tests = []
     passed_tests = []
-    for circ_path in circ_paths:
-        if "imm" in str(circ_path):
-            update_imm_circ()
-
-        test = TestCase(circ_path)
-        did_pass, reason, extra = False, "Unknown test error", None
-        try:
-            did_pass, reason, extra = test.run(pipelined=pipelined)
-        except KeyboardInterrupt:
-            raise
-        except SystemExit:
-            raise
-        except:
-            traceback.print_exc()
-        if did_pass:
-            print(f"PASS: {test.id}", flush=True)
-            passed_tests.append(test)
-        else:
-            print(f"FAIL: {test.id} ({reason})", flush=True)
-            failed_tests.append(test)
-        if extra:
-            print(textwrap.indent(extra, "  "), flush=True)
+    # each worker just blocks on a java subprocess, so threads are enough
+    max_workers = max(1, min(os.cpu_count() or 1, len(circ_paths)))
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [
+        executor.submit(run_one_test, circ_path, pipelined)
+        for circ_path in circ_paths
+    ]
+    try:
+        for future in as_completed(futures):
+            test, did_pass, reason, extra = future.result()
+            if did_pass:
+                lines = [f"PASS: {test.id}"]
+                passed_tests.append(test)
+            else:
+                lines = [f"FAIL: {test.id} ({reason})"]
+                failed_tests.append(test)
+            if extra:
+                lines.append(textwrap.indent(extra, "  "))
+            # one write and flush per result keeps progress visible without
+            # paying a syscall per line
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        # abort promptly: drop every queued test and kill any in-flight
+        # runner JVMs instead of letting shutdown drain the whole queue
+        executor.shutdown(wait=False, cancel_futures=True)
+        close_runners()
+        sys.exit(1)
+    executor.shutdown()
+
+    close_runners()
+    save_fix_circ_cache()
+    save_run_cache()
 
     print(
         f"Passed {len(passed_tests)}/{len(failed_tests) + len(passed_tests)} tests",
@@ -371,18 +753,52 @@ def run_tests(search_paths, pipelined=False):
     )
 
 
+def hash_file_normalized(path, h):
+    # stream the file through a fixed 1 MiB buffer rather than slurping it,
+    # normalizing CRLF inline; a trailing "\r" is held back in case the "\n"
+    # lands at the start of the next chunk
+    buf = bytearray(1 << 20)
+    view = memoryview(buf)
+    leftover_cr = False
+    with path.open("rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            chunk = bytes(view[:n])
+            if leftover_cr:
+                if not chunk.startswith(b"\n"):
+                    h.update(b"\r")
+                leftover_cr = False
+            chunk = chunk.replace(b"\r\n", b"\n")
+            if chunk.endswith(b"\r"):
+                leftover_cr = True
+                chunk = chunk[:-1]
+            h.update(chunk)
+    if leftover_cr:
+        h.update(b"\r")
+    return h.hexdigest()
+
+
+# memoizes check_hash by (path, mtime, size) so shared files (e.g. the
+# harnesses) are only read and hashed once per run instead of once per test
+_hash_cache = {}
+
+
 def check_hash(path):
-    rel_path = path.resolve().relative_to(proj_dir_path.resolve())
+    rel_path = path.resolve().relative_to(resolved_proj_dir_path)
     rel_path_str = rel_path.as_posix()
     if rel_path_str not in starter_file_hashes:
         return (True, f"Starter does not have hash for {rel_path_str}")
-    with path.open("rb") as f:
-        contents = f.read()
-    contents = contents.replace(b"\r\n", b"\n")
-    hashed_val = hashlib.md5(contents).hexdigest()
+    stat = os.stat(path)
+    cache_key = (rel_path_str, stat.st_mtime_ns, stat.st_size)
+    cached = _hash_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    hashed_val = hash_file_normalized(path, hashlib.blake2b(digest_size=16))
     if hashed_val != starter_file_hashes[rel_path_str]:
-        return (False, f"{rel_path_str} was changed from starter")
-    return (True, f"{rel_path_str} matches starter file")
+        result = (False, f"{rel_path_str} was changed from starter")
+    else:
+        result = (True, f"{rel_path_str} matches starter file")
+    _hash_cache[cache_key] = result
+    return result
 
 
 def kill_proc(proc):